@@ -11,6 +11,14 @@ class AppSetting(BaseSettings):
     PGSSLMODE: str = "require"
     OPENAI_API_KEY: str = "your-openai-api-key"
 
+    # SQLAlchemyコネクションプールの設定（環境変数で調整可能）
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 30
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 3600
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_USE_LIFO: bool = True
+
     @property
     def DATABASE_URL_SYNC(self) -> str:
         return f"postgresql+psycopg://{self.PGUSER}:{self.PGPASSWORD}@{self.PGHOST}:{self.PGPORT}/{self.PGDATABASE}"
@@ -3,13 +3,17 @@ Data processing utilities for handling Q&A data and database operations using SQ
 """
 
 import time
+from contextlib import contextmanager
+from functools import lru_cache
 from typing import Any, Optional
 
 import polars as pl
-from sqlalchemy import create_engine, select
-from sqlalchemy.exc import IntegrityError
+from psycopg.types.json import Jsonb
+from sqlalchemy import Engine, insert, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session, sessionmaker
 
+from db.engine import get_engine
 from db.models.schema import Chunks, CopyrightHolders, Sources
 
 from .embedding import EmbeddingManager
@@ -20,13 +24,19 @@ from .text_processing import TextProcessor
 class DataProcessor:
     """データ処理とデータベース操作を担当するクラス（SQLAlchemy ORM使用）"""
 
-    def __init__(self, connection_string: str, logger: Optional[DualLogger] = None):
+    def __init__(
+        self,
+        connection_string: str,
+        logger: Optional[DualLogger] = None,
+        engine: Optional[Engine] = None,
+    ):
         """
         Args:
             connection_string: データベース接続文字列
             logger: ログ出力用のロガー
+            engine: 使用するengine（省略時はプロセス共有のengineを使用）
         """
-        self.engine = create_engine(connection_string)
+        self.engine = engine or get_engine(connection_string)
         self.SessionLocal = sessionmaker(
             autocommit=False, autoflush=False, bind=self.engine
         )
@@ -34,6 +44,16 @@ class DataProcessor:
         self.embedding_manager = EmbeddingManager()
         self.logger = logger or DualLogger()
 
+        # upsert結果のインプロセスキャッシュ（同一セッション内の再検索を回避。
+        # ロールバック時は未コミットのidが残らないようクリアする）
+        self._copyright_holder_ids: dict[str, int] = {}
+        self._source_ids: dict[str, int] = {}
+
+    def _clear_id_caches(self):
+        """ロールバック後に呼び、未コミットの可能性があるidを破棄する"""
+        self._copyright_holder_ids.clear()
+        self._source_ids.clear()
+
     async def initialize(self) -> bool:
         """データプロセッサーを初期化"""
         # embedding管理の初期化
@@ -46,62 +66,96 @@ class DataProcessor:
 
         return embedding_available
 
-    def insert_copyright_holder(self, session: Session, name: str) -> int:
-        """著作権者を挿入"""
-        try:
-            # 既存の著作権者を検索
-            existing = session.execute(
-                select(CopyrightHolders).where(CopyrightHolders.name == name)
-            ).scalar_one_or_none()
+    @contextmanager
+    def bulk_ingest(self):
+        """バルクロード中はANNインデックスを外し、完了後に再構築する
 
-            if existing:
-                return existing.id
+        ベクトルテーブルへのINSERTはインデックス更新コストが支配的なため、
+        コールドロード→一括再構築の方が逐次メンテナンスより大幅に速い。
+        """
+        with self.engine.begin() as conn:
+            conn.execute(text("DROP INDEX IF EXISTS chunks_embeding_idx"))
+        self.logger.info("ANNインデックスを削除しました（バルクロード開始）")
 
-            # 新しい著作権者を作成
-            copyright_holder = CopyrightHolders(name=name)
-            session.add(copyright_holder)
-            session.flush()  # IDを取得するためにflush
-            return copyright_holder.id
+        try:
+            yield self
+        finally:
+            self.logger.info("ANNインデックスを再構築中...")
+            with self.engine.begin() as conn:
+                # 再構築を並列化してメモリ内で完結させる
+                # （SET LOCALでトランザクション終了後に設定が残らないようにする。
+                #   接続はプールに戻るため、セッションスコープのSETは不可）
+                conn.execute(text("SET LOCAL maintenance_work_mem = '2GB'"))
+                conn.execute(text("SET LOCAL max_parallel_maintenance_workers = 4"))
+                conn.execute(
+                    text(
+                        "CREATE INDEX IF NOT EXISTS chunks_embeding_idx "
+                        "ON chunks USING hnsw (embeding halfvec_cosine_ops) "
+                        "WITH (m = 16, ef_construction = 64)"
+                    )
+                )
+            self.logger.info("ANNインデックスの再構築が完了しました")
 
-        except IntegrityError:
-            session.rollback()
-            # 重複エラーの場合、再度検索
-            existing = session.execute(
-                select(CopyrightHolders).where(CopyrightHolders.name == name)
+    def insert_copyright_holder(self, session: Session, name: str) -> int:
+        """著作権者を挿入（既存の場合はそのidを返す）"""
+        # 一度解決したidはプロセス内で再利用して往復を省く
+        cached_id = self._copyright_holder_ids.get(name)
+        if cached_id is not None:
+            return cached_id
+
+        # ON CONFLICTで挿入と重複チェックを1往復にまとめる
+        stmt = (
+            pg_insert(CopyrightHolders)
+            .values(name=name)
+            .on_conflict_do_nothing(index_elements=["name"])
+            .returning(CopyrightHolders.id)
+        )
+        inserted_id = session.execute(stmt).scalar_one_or_none()
+        if inserted_id is None:
+            # 競合した場合は既存行のidを検索
+            inserted_id = session.execute(
+                select(CopyrightHolders.id).where(CopyrightHolders.name == name)
             ).scalar_one()
-            return existing.id
+
+        self._copyright_holder_ids[name] = inserted_id
+        return inserted_id
 
     def insert_source(
         self, session: Session, copyright_holder_id: int, url: str
     ) -> int:
-        """ソースを挿入"""
-        try:
-            # 既存のソースを検索
-            existing = session.execute(
-                select(Sources).where(Sources.url == url)
-            ).scalar_one_or_none()
-
-            if existing:
-                return existing.id
-
-            # 新しいソースを作成
-            source = Sources(copyright_holder_id=copyright_holder_id, url=url)
-            session.add(source)
-            session.flush()  # IDを取得するためにflush
-            return source.id
-
-        except IntegrityError:
-            session.rollback()
-            # 重複エラーの場合、再度検索
-            existing = session.execute(
-                select(Sources).where(Sources.url == url)
+        """ソースを挿入（既存の場合はそのidを返す）"""
+        # 一度解決したidはプロセス内で再利用して往復を省く
+        cached_id = self._source_ids.get(url)
+        if cached_id is not None:
+            return cached_id
+
+        # ON CONFLICTで挿入と重複チェックを1往復にまとめる
+        stmt = (
+            pg_insert(Sources)
+            .values(copyright_holder_id=copyright_holder_id, url=url)
+            .on_conflict_do_nothing(index_elements=["url"])
+            .returning(Sources.id)
+        )
+        inserted_id = session.execute(stmt).scalar_one_or_none()
+        if inserted_id is None:
+            # 競合した場合は既存行のidを検索
+            inserted_id = session.execute(
+                select(Sources.id).where(Sources.url == url)
             ).scalar_one()
-            return existing.id
+
+        self._source_ids[url] = inserted_id
+        return inserted_id
 
     async def insert_chunks_with_embeddings(
         self, session: Session, source_id: int, chunks_data: list[dict[str, Any]]
     ):
         """embeddingを生成してチャンクを挿入"""
+        # 空・空白のみのチャンクはAPI呼び出しと行書き込みの無駄なので除外
+        chunks_data = [
+            chunk_data
+            for chunk_data in chunks_data
+            if chunk_data["text"] and chunk_data["text"].strip()
+        ]
         if not chunks_data:
             return
 
@@ -109,70 +163,138 @@ class DataProcessor:
         texts = [chunk_data["text"] for chunk_data in chunks_data]
         embeddings = await self.embedding_manager.create_embeddings_batch(texts)
 
-        # チャンクを作成
-        chunks = []
-        for chunk_data, embedding in zip(chunks_data, embeddings):
-            chunk = Chunks(
-                source_id=source_id,
-                content=chunk_data["text"],
-                embeding=embedding,  # スキーマのtypoに合わせる
-                metadata_=chunk_data["metadata"],
-            )
-            chunks.append(chunk)
+        # 行単位の少量挿入はCore executemanyで行う
+        # （ORMオブジェクト生成・identity map・イベント発火を全て回避。
+        #   大きなバッチはprocess_row_batch側のCOPYが担当する）
+        rows = [
+            {
+                "source_id": source_id,
+                "content": chunk_data["text"],
+                "embeding": embedding,
+                "chunk_type": chunk_data["chunk_type"],
+                "chunk_index": chunk_data["chunk_index"],
+                "chunk_method": chunk_data["chunk_method"],
+                "is_question": chunk_data["is_question"],
+                "metadata_": chunk_data["metadata"],
+            }
+            for chunk_data, embedding in zip(chunks_data, embeddings)
+        ]
+        session.execute(insert(Chunks), rows)
 
-        session.add_all(chunks)
+    def copy_chunks(self, session: Session, records: list[dict[str, Any]]):
+        """チャンクをバイナリCOPYで一括挿入
 
-    async def process_row(
-        self, session: Session, row: dict[str, Any], chunk_strategy: str = "token"
-    ) -> int:
-        """1行のデータを処理"""
-        try:
-            # 著作権者とソース挿入
-            copyright_holder_id = self.insert_copyright_holder(
-                session, row["copyright"]
-            )
-            source_id = self.insert_source(session, copyright_holder_id, row["url"])
-
-            chunks_data = []
-
-            # 1. 質問を1つのチャンクとして追加
-            question_metadata = {
-                "type": "question",
-                "question": row["Question"],
-                "answer": row["Answer"],
-                "chunk_info": {
-                    "chunk_method": "single",
-                    "chunk_index": 0,
-                    "is_question": True,
+        Args:
+            session: 使用するセッション
+            records: source_id, text, metadata, embeddingを持つdictのリスト
+        """
+        # sessionのトランザクション内で生のpsycopg接続を取得
+        driver_conn = session.connection().connection.driver_connection
+        with driver_conn.cursor() as cur:
+            with cur.copy(
+                "COPY chunks (source_id, content, embeding, chunk_type, "
+                "chunk_index, chunk_method, is_question, metadata) "
+                "FROM STDIN (FORMAT BINARY)"
+            ) as copy:
+                copy.set_types(
+                    [
+                        "int4",
+                        "text",
+                        "halfvec",
+                        "text",
+                        "int4",
+                        "text",
+                        "bool",
+                        "jsonb",
+                    ]
+                )
+                for record in records:
+                    copy.write_row(
+                        (
+                            record["source_id"],
+                            record["text"],
+                            record["embedding"],
+                            record["chunk_type"],
+                            record["chunk_index"],
+                            record["chunk_method"],
+                            record["is_question"],
+                            Jsonb(record["metadata"]),
+                        )
+                    )
+
+    def build_row_chunks(
+        self,
+        session: Session,
+        row: dict[str, Any],
+        chunk_strategy: str = "token",
+        answer_chunks: Optional[list[str]] = None,
+    ) -> list[dict[str, Any]]:
+        """1行分のチャンクデータを構築（embeddingはまだ生成しない）
+
+        answer_chunksが渡された場合は事前チャンキング済みとみなし、
+        この関数内では再チャンキングしない。
+        """
+        # 著作権者とソース挿入
+        copyright_holder_id = self.insert_copyright_holder(session, row["copyright"])
+        source_id = self.insert_source(session, copyright_holder_id, row["url"])
+
+        chunks_data = []
+
+        # 1. 質問を1つのチャンクとして追加
+        # （type/chunk_index等のホットなフィールドは型付きカラムに格納し、
+        #   metadataには自由形式の項目のみ残す）
+        chunks_data.append(
+            {
+                "source_id": source_id,
+                "text": row["Question"],
+                "chunk_type": "question",
+                "chunk_index": 0,
+                "chunk_method": "single",
+                "is_question": True,
+                "metadata": {
+                    "question": row["Question"],
+                    "answer": row["Answer"],
                 },
             }
+        )
 
-            chunks_data.append({"text": row["Question"], "metadata": question_metadata})
-
-            # 2. 回答をチャンキング
+        # 2. 回答をチャンキング（事前チャンキングされていない場合のみ）
+        if answer_chunks is None:
             answer_chunks = self.text_processor.chunk_text(
                 row["Answer"], chunk_strategy
             )
 
-            for i, chunk_text in enumerate(answer_chunks):
-                answer_metadata = {
-                    "type": "answer",
-                    "question": row["Question"],
-                    "answer": row["Answer"],
-                    "answer_chunk": chunk_text,
-                    "chunk_info": {
-                        "chunk_method": chunk_strategy,
-                        "chunk_index": i + 1,  # question is index 0
+        # 回答チャンクには全文を持たせない
+        # （質問・回答の全文はquestionチャンクのmetadataにのみ保存し、
+        #   回答チャンク側はsource_id経由で参照する）
+        for i, chunk_text in enumerate(answer_chunks):
+            chunks_data.append(
+                {
+                    "source_id": source_id,
+                    "text": chunk_text,
+                    "chunk_type": "answer",
+                    "chunk_index": i + 1,  # question is index 0
+                    "chunk_method": chunk_strategy,
+                    "is_question": False,
+                    "metadata": {
                         "total_answer_chunks": len(answer_chunks),
                         "original_length": len(row["Answer"]),
-                        "is_question": False,
                     },
                 }
+            )
+
+        return chunks_data
 
-                chunks_data.append({"text": chunk_text, "metadata": answer_metadata})
+    async def process_row(
+        self, session: Session, row: dict[str, Any], chunk_strategy: str = "token"
+    ) -> int:
+        """1行のデータを処理（行単位のフォールバックパス）"""
+        try:
+            chunks_data = self.build_row_chunks(session, row, chunk_strategy)
 
             # チャンク挿入（embeddingを生成）
             if self.embedding_manager.is_available():
+                source_id = chunks_data[0]["source_id"]
                 await self.insert_chunks_with_embeddings(
                     session, source_id, chunks_data
                 )
@@ -186,24 +308,97 @@ class DataProcessor:
                 e, f"processing row with URL: {row.get('url', 'unknown')}"
             )
             session.rollback()
+            self._clear_id_caches()
             return 0
 
+    async def process_row_batch(
+        self,
+        session: Session,
+        rows: list[dict[str, Any]],
+        chunk_strategy: str = "token",
+    ) -> tuple[int, int]:
+        """複数行のチャンクをまとめてembedding生成して挿入
+
+        行ごとにembedding APIを呼ぶ代わりに、バッチ内の全チャンクを
+        1回のリクエストにまとめてHTTP往復を削減する。バッチ処理が
+        失敗した場合は行単位のフォールバックでエラーを分離する。
+
+        Returns:
+            (処理した行数, 作成したチャンク数)のタプル
+        """
+        # 回答のチャンキングをワーカープロセスで並列実行
+        all_answer_chunks = await self.text_processor.chunk_many(
+            [row["Answer"] for row in rows], chunk_strategy
+        )
+
+        try:
+            # 各行のチャンクデータを構築（embedding未生成）
+            # upsertのidはインプロセスキャッシュで解決されるため、
+            # 既知の著作権者・URLではDB往復が発生しない
+            row_chunks: list[tuple[dict[str, Any], list[dict[str, Any]]]] = []
+            for row, answer_chunks in zip(rows, all_answer_chunks):
+                row_chunks.append(
+                    (
+                        row,
+                        self.build_row_chunks(
+                            session, row, chunk_strategy, answer_chunks
+                        ),
+                    )
+                )
+
+            # 空・空白のみのチャンク（スプリッターの端数）はここで除外
+            all_chunks = [
+                chunk
+                for _, chunks in row_chunks
+                for chunk in chunks
+                if chunk["text"] and chunk["text"].strip()
+            ]
+            if not all_chunks:
+                return 0, 0
+
+            texts = [chunk["text"] for chunk in all_chunks]
+            embeddings = await self.embedding_manager.create_embeddings_batch(texts)
+            records = [
+                {**chunk, "embedding": embedding}
+                for chunk, embedding in zip(all_chunks, embeddings)
+            ]
+            self.copy_chunks(session, records)
+            return len(row_chunks), len(records)
+
+        except Exception as e:
+            # upsert・embedding・COPYのいずれかが失敗したらバッチを
+            # ロールバックし、行単位で再試行してエラーを分離する
+            # （process_rowがupsertからやり直すので途中結果は捨ててよい）
+            self.logger.log_error(e, f"batch of {len(rows)} rows, falling back")
+            session.rollback()
+            self._clear_id_caches()
+            processed = 0
+            total_chunks = 0
+            for row in rows:
+                chunks_count = await self.process_row(session, row, chunk_strategy)
+                if chunks_count > 0:
+                    processed += 1
+                    total_chunks += chunks_count
+            return processed, total_chunks
+
     async def insert_dataframe(
         self,
-        df: pl.DataFrame,
+        df: pl.DataFrame | pl.LazyFrame,
         chunk_strategy: str = "token",
         limit: Optional[int] = None,
         progress_interval: int = 100,
         commit_interval: int = 50,
     ) -> dict[str, int]:
-        """DataFrameからデータを挿入"""
-        data = df.to_dicts()
-        total_rows = len(data)
-
+        """DataFrame（またはLazyFrame）からデータを挿入"""
         # limitが指定されている場合は制限
         if limit is not None:
-            data = data[:limit]
-            total_rows = len(data)
+            df = df.slice(0, limit)
+
+        # LazyFrameはストリーミングエンジンで収集
+        if isinstance(df, pl.LazyFrame):
+            df = df.collect(engine="streaming")
+
+        total_rows = df.height
 
         # 処理開始ログ
         self.logger.log_processing_start(total_rows, chunk_strategy)
@@ -218,31 +413,46 @@ class DataProcessor:
         processed = 0
         start_time = time.time()
 
-        with self.SessionLocal() as session:
-            try:
-                for i, row in enumerate(data):
-                    chunks_count = await self.process_row(session, row, chunk_strategy)
-                    total_chunks += chunks_count
-                    processed += 1
+        consumed = 0
 
-                    # 定期的にコミット
-                    if processed % commit_interval == 0:
-                        session.commit()
-                        self.logger.log_commit(processed, total_chunks)
+        with self.SessionLocal() as session:
 
-                    # 進捗ログ
-                    if processed % progress_interval == 0:
-                        elapsed_time = time.time() - start_time
-                        self.logger.log_processing_progress(
-                            processed, total_rows, total_chunks, elapsed_time
-                        )
+            async def flush_batch(batch: list[dict[str, Any]]):
+                nonlocal processed, total_chunks
+                batch_processed, batch_chunks = await self.process_row_batch(
+                    session, batch, chunk_strategy
+                )
+                processed += batch_processed
+                total_chunks += batch_chunks
 
-                # 最終コミット
                 session.commit()
                 self.logger.log_commit(processed, total_chunks)
 
+                # 進捗ログ
+                if consumed % progress_interval == 0:
+                    elapsed_time = time.time() - start_time
+                    self.logger.log_processing_progress(
+                        processed, total_rows, total_chunks, elapsed_time
+                    )
+
+            try:
+                # 行をストリーミングで読み、commit_interval行ずつ
+                # まとめてembedding生成・挿入・コミット
+                # （to_dicts()による全行のdict化を避ける）
+                batch: list[dict[str, Any]] = []
+                for row in df.iter_rows(named=True):
+                    batch.append(row)
+                    consumed += 1
+                    if len(batch) >= commit_interval:
+                        await flush_batch(batch)
+                        batch = []
+
+                if batch:
+                    await flush_batch(batch)
+
             except Exception as e:
                 session.rollback()
+                self._clear_id_caches()
                 self.logger.log_error(e, "データ挿入処理")
                 raise
 
@@ -253,17 +463,31 @@ class DataProcessor:
         return {"processed_rows": processed, "total_chunks": total_chunks}
 
     def get_database_statistics(self) -> dict[str, int]:
-        """データベースの統計情報を取得"""
+        """データベースの統計情報を取得（プランナー統計による近似値）"""
+        # 60秒単位のタイムバケットをキーにして結果をキャッシュ
+        return dict(self._get_statistics_cached(int(time.time() // 60)))
+
+    @lru_cache(maxsize=1)
+    def _get_statistics_cached(self, time_bucket: int) -> dict[str, int]:
+        """pg_classのreltuplesから行数の近似値を取得
+
+        COUNT(*)のフルスキャンを避けてカタログ参照のみで済ませる。
+        ANALYZE/autovacuum後の統計値のため厳密な行数ではない。
+        """
         with self.SessionLocal() as session:
-            copyright_count = session.query(CopyrightHolders).count()
-            source_count = session.query(Sources).count()
-            chunk_count = session.query(Chunks).count()
-
-            return {
-                "copyright_holders": copyright_count,
-                "sources": source_count,
-                "chunks": chunk_count,
-            }
+            rows = session.execute(
+                text(
+                    "SELECT relname, reltuples::bigint FROM pg_class "
+                    "WHERE relname IN ('copyright_holders', 'sources', 'chunks')"
+                )
+            ).all()
+
+        counts = {relname: max(reltuples, 0) for relname, reltuples in rows}
+        return {
+            "copyright_holders": counts.get("copyright_holders", 0),
+            "sources": counts.get("sources", 0),
+            "chunks": counts.get("chunks", 0),
+        }
 
     def check_embeddings(self) -> dict[str, Any]:
         """embeddingが正しく生成されているか確認"""
@@ -273,7 +497,8 @@ class DataProcessor:
             if chunk:
                 return {
                     "has_embeddings": True,
-                    "embedding_dimension": len(chunk.embeding),
+                    # halfvecカラムはHalfVectorとして返る（__len__は持たない）
+                    "embedding_dimension": chunk.embeding.dimensions(),
                     "sample_text": chunk.content[:100] + "...",
                 }
             else:
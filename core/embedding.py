@@ -2,12 +2,14 @@
 Embedding management utilities using OpenAI API.
 """
 
+import asyncio
 import logging
 import os
-import time
 from typing import List
 
-from openai import OpenAI, RateLimitError
+import numpy as np
+import tiktoken
+from openai import APIConnectionError, APITimeoutError, AsyncOpenAI, RateLimitError
 from tenacity import (
     before_sleep_log,
     retry,
@@ -24,9 +26,16 @@ class EmbeddingManager:
         """
         OpenAI APIクライアントを初期化
         """
-        self.client: OpenAI
+        self.client: AsyncOpenAI
         self.model = "text-embedding-3-small"
         self.dimensions = 1536
+        # モデルの入力トークン上限（超過分は切り詰めてAPIの400エラーを防ぐ）
+        self.max_input_tokens = 8192
+        self._encoding = tiktoken.get_encoding("cl100k_base")
+        # 同時に投げるバッチリクエスト数の上限
+        self._sem = asyncio.Semaphore(8)
+        # 一度embedding化したテキストのキャッシュ（プロセス生存中有効）
+        self._embed_cache: dict[str, np.ndarray] = {}
 
     def initialize(self) -> bool:
         """OpenAI APIクライアントを初期化"""
@@ -36,7 +45,7 @@ class EmbeddingManager:
             return False
 
         try:
-            self.client = OpenAI(api_key=api_key)
+            self.client = AsyncOpenAI(api_key=api_key)
             print("✅ OpenAI API client initialized")
             return True
         except Exception as e:
@@ -44,12 +53,14 @@ class EmbeddingManager:
             return False
 
     @retry(
-        retry=retry_if_exception_type((RateLimitError, Exception)),
+        retry=retry_if_exception_type(
+            (RateLimitError, APIConnectionError, APITimeoutError)
+        ),
         stop=stop_after_attempt(5),
         wait=wait_exponential(multiplier=1, min=4, max=60),
         before_sleep=before_sleep_log(logging.getLogger(__name__), logging.WARNING),
     )
-    async def create_embedding(self, text: str) -> List[float]:
+    async def create_embedding(self, text: str) -> np.ndarray:
         """
         テキストからembeddingを生成（rate limit対策付き）
 
@@ -57,16 +68,18 @@ class EmbeddingManager:
             text: embedding化するテキスト
 
         Returns:
-            embedding vector
+            embedding vector（float32のnumpy配列）
         """
         if not self.client:
             raise RuntimeError("OpenAI client not initialized")
 
+        text = self._truncate_text(text)
+
         try:
-            response = self.client.embeddings.create(
+            response = await self.client.embeddings.create(
                 model=self.model, input=text, dimensions=self.dimensions
             )
-            return response.data[0].embedding
+            return np.asarray(response.data[0].embedding, dtype=np.float32)
         except RateLimitError as e:
             print(f"Rate limit exceeded, retrying: {e}")
             raise
@@ -74,60 +87,87 @@ class EmbeddingManager:
             print(f"Error creating embedding: {e}")
             raise
 
-    @retry(
-        retry=retry_if_exception_type((RateLimitError, Exception)),
-        stop=stop_after_attempt(5),
-        wait=wait_exponential(multiplier=1, min=4, max=60),
-        before_sleep=before_sleep_log(logging.getLogger(__name__), logging.WARNING),
-    )
-    async def create_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+    async def create_embeddings_batch(self, texts: List[str]) -> List[np.ndarray]:
         """
         複数のテキストからembeddingを一括生成（rate limit対策付き）
 
+        リトライは_create_embeddings_batch_internal側でのみ行う
+        （二重retryによる指数的な再試行を避けるため）。
+
         Args:
             texts: embedding化するテキストのリスト
 
         Returns:
-            embedding vectorsのリスト
+            embedding vectors（float32のnumpy配列）のリスト
         """
         if not self.client:
             raise RuntimeError("OpenAI client not initialized")
 
-        # バッチサイズが大きすぎる場合は分割処理
+        # トークン上限を超えるテキストは事前に切り詰める
+        # （API側の400エラーとtenacityのリトライ1周分を節約する）
+        texts = [self._truncate_text(text) for text in texts]
+
+        # 未知のテキストだけAPIに問い合わせる
+        # （キャッシュは呼び出しをまたいで効くため、別のコミット
+        #   ウィンドウに再出現した同一テキストも再課金されない）
+        pending = [
+            text for text in dict.fromkeys(texts) if text not in self._embed_cache
+        ]
+        if len(pending) < len(texts):
+            print(f"Deduplicated batch: {len(texts)} texts -> {len(pending)} to embed")
+
+        # バッチサイズが大きすぎる場合は分割して並行処理
+        # （同時リクエスト数はセマフォで制限）
         max_batch_size = 100  # OpenAI APIの推奨バッチサイズ
-        if len(texts) > max_batch_size:
+        if len(pending) > max_batch_size:
             print(
-                f"Large batch detected ({len(texts)} texts), splitting into smaller batches"
+                f"Large batch detected ({len(pending)} texts), splitting into smaller batches"
+            )
+            batches = [
+                pending[i : i + max_batch_size]
+                for i in range(0, len(pending), max_batch_size)
+            ]
+            results = await asyncio.gather(
+                *(self._create_embeddings_batch_internal(batch) for batch in batches)
             )
-            all_embeddings = []
-            for i in range(0, len(texts), max_batch_size):
-                batch = texts[i : i + max_batch_size]
-                batch_embeddings = await self._create_embeddings_batch_internal(batch)
-                all_embeddings.extend(batch_embeddings)
-                # バッチ間で少し待機してrate limitを回避
-                if i + max_batch_size < len(texts):
-                    time.sleep(0.1)
-            return all_embeddings
+            new_embeddings = [
+                embedding for batch_result in results for embedding in batch_result
+            ]
+        elif pending:
+            new_embeddings = await self._create_embeddings_batch_internal(pending)
         else:
-            return await self._create_embeddings_batch_internal(texts)
+            new_embeddings = []
+
+        # キャッシュに取り込み、元の並びに展開して返す
+        self._embed_cache.update(zip(pending, new_embeddings))
+        return [self._embed_cache[text] for text in texts]
 
     @retry(
-        retry=retry_if_exception_type((RateLimitError, Exception)),
+        retry=retry_if_exception_type(
+            (RateLimitError, APIConnectionError, APITimeoutError)
+        ),
         stop=stop_after_attempt(5),
         wait=wait_exponential(multiplier=1, min=4, max=60),
         before_sleep=before_sleep_log(logging.getLogger(__name__), logging.WARNING),
     )
     async def _create_embeddings_batch_internal(
         self, texts: List[str]
-    ) -> List[List[float]]:
+    ) -> List[np.ndarray]:
         """
         内部的なバッチ処理メソッド
+
+        float32の連続メモリ配列に変換して返す
+        （pgvectorのバイナリアダプターがそのままmemcpyできる形式）。
         """
         try:
-            response = self.client.embeddings.create(
-                model=self.model, input=texts, dimensions=self.dimensions
-            )
-            return [data.embedding for data in response.data]
+            async with self._sem:
+                response = await self.client.embeddings.create(
+                    model=self.model, input=texts, dimensions=self.dimensions
+                )
+            return [
+                np.asarray(data.embedding, dtype=np.float32)
+                for data in response.data
+            ]
         except RateLimitError as e:
             print(f"Rate limit exceeded for batch of {len(texts)} texts, retrying: {e}")
             raise
@@ -135,6 +175,14 @@ class EmbeddingManager:
             print(f"Error creating batch embeddings for {len(texts)} texts: {e}")
             raise
 
+    def _truncate_text(self, text: str) -> str:
+        """モデルの入力トークン上限を超えるテキストを切り詰める"""
+        tokens = self._encoding.encode(text)
+        if len(tokens) <= self.max_input_tokens:
+            return text
+        print(f"Truncating text from {len(tokens)} to {self.max_input_tokens} tokens")
+        return self._encoding.decode(tokens[: self.max_input_tokens])
+
     def is_available(self) -> bool:
         """OpenAI APIが利用可能かどうかを返す"""
         return self.client is not None
@@ -3,8 +3,10 @@ Logging utilities for data processing operations.
 """
 
 import logging
+import queue
 import sys
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from typing import Optional
 
@@ -34,32 +36,47 @@ class DualLogger:
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(level)
         console_handler.setFormatter(formatter)
-        self.logger.addHandler(console_handler)
 
         # ファイルハンドラー
         file_handler = logging.FileHandler(self.log_file, encoding="utf-8")
         file_handler.setLevel(level)
         file_handler.setFormatter(formatter)
-        self.logger.addHandler(file_handler)
+
+        # 書き込みI/Oはバックグラウンドスレッドに委譲
+        # （FileHandlerの同期書き込み+flushで挿入ループを止めない）
+        log_queue: queue.Queue = queue.Queue(-1)
+        self.logger.addHandler(QueueHandler(log_queue))
+        self._listener = QueueListener(
+            log_queue, console_handler, file_handler, respect_handler_level=True
+        )
+        self._listener.start()
 
         # プロパゲーションを無効にして重複を防ぐ
         self.logger.propagate = False
 
-    def info(self, message: str):
+    def close(self):
+        """キューに残ったログを書き切ってリスナースレッドを停止する
+
+        リスナーはデーモンスレッドのため、これを呼ばずにプロセスが
+        終了すると末尾のログ（統計・完了メッセージ等）が失われる。
+        """
+        self._listener.stop()
+
+    def info(self, message: str, *args):
         """情報レベルのログを出力"""
-        self.logger.info(message)
+        self.logger.info(message, *args)
 
-    def warning(self, message: str):
+    def warning(self, message: str, *args):
         """警告レベルのログを出力"""
-        self.logger.warning(message)
+        self.logger.warning(message, *args)
 
-    def error(self, message: str):
+    def error(self, message: str, *args):
         """エラーレベルのログを出力"""
-        self.logger.error(message)
+        self.logger.error(message, *args)
 
-    def debug(self, message: str):
+    def debug(self, message: str, *args):
         """デバッグレベルのログを出力"""
-        self.logger.debug(message)
+        self.logger.debug(message, *args)
 
     def log_processing_start(self, total_rows: int, chunk_strategy: str):
         """処理開始のログ"""
@@ -78,11 +95,18 @@ class DualLogger:
         rate = processed / elapsed_time if elapsed_time > 0 else 0
         eta = (total - processed) / rate if rate > 0 else 0
 
+        # %スタイルの遅延フォーマットでログレベル無効時の整形コストを回避
         self.info(
-            f"進捗: {processed:,}/{total:,} ({percentage:.1f}%) | "
-            f"チャンク作成数: {chunks_created:,} | "
-            f"処理速度: {rate:.1f} rows/sec | "
-            f"推定残り時間: {eta:.0f}秒"
+            "進捗: %d/%d (%.1f%%) | "
+            "チャンク作成数: %d | "
+            "処理速度: %.1f rows/sec | "
+            "推定残り時間: %.0f秒",
+            processed,
+            total,
+            percentage,
+            chunks_created,
+            rate,
+            eta,
         )
 
     def log_processing_complete(
@@ -101,9 +125,9 @@ class DualLogger:
     def log_error(self, error: Exception, context: Optional[str] = None):
         """エラーログ"""
         if context:
-            self.error(f"エラーが発生しました ({context}): {str(error)}")
+            self.error("エラーが発生しました (%s): %s", context, error)
         else:
-            self.error(f"エラーが発生しました: {str(error)}")
+            self.error("エラーが発生しました: %s", error)
 
     def log_statistics(self, stats: dict):
         """統計情報のログ"""
@@ -124,7 +148,11 @@ class DualLogger:
 
     def log_commit(self, processed_rows: int, total_chunks: int):
         """コミット時のログ"""
-        self.info(f"💾 データベースにコミット完了: {processed_rows} 行処理済み, {total_chunks} チャンク作成済み")
+        self.info(
+            "💾 データベースにコミット完了: %d 行処理済み, %d チャンク作成済み",
+            processed_rows,
+            total_chunks,
+        )
 
     def log_batch_split(self, total_texts: int, batch_size: int):
         """バッチ分割時のログ"""
@@ -2,26 +2,66 @@
 Text processing and chunking utilities.
 """
 
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import tiktoken
 from langchain.text_splitter import RecursiveCharacterTextSplitter, TokenTextSplitter
 from langchain_text_splitters import CharacterTextSplitter
 
+# tiktokenのエンコーディングテーブルはimport時に一度だけ構築する
+# （初回チャンキング時のウォームアップコストをプロセスごとに前払いする）
+_TOKEN_ENCODING = tiktoken.get_encoding("cl100k_base")
+
+
+def _chunk_batch(texts: list[str], strategy: str) -> list[list[str]]:
+    """ワーカープロセス側で複数テキストをチャンキングする"""
+    splitter = TextProcessor.text_splitters.get(
+        strategy, TextProcessor.text_splitters["recursive"]
+    )
+    return [splitter.split_text(text) for text in texts]
+
 
 class TextProcessor:
     """テキストのチャンキング処理を担当するクラス"""
 
+    # 全インスタンスで共有するスプリッター（プロセスごとに1回だけ初期化）
+    text_splitters = {
+        "recursive": RecursiveCharacterTextSplitter(
+            chunk_size=500,
+            chunk_overlap=50,
+            separators=["\n\n", "\n", "。", ".", " ", ""],
+        ),
+        "token": TokenTextSplitter(
+            chunk_size=400, chunk_overlap=40, encoding_name=_TOKEN_ENCODING.name
+        ),
+        "character": CharacterTextSplitter(
+            chunk_size=600, chunk_overlap=60, separator="\n"
+        ),
+    }
+
     def __init__(self):
-        """チャンキング戦略を初期化"""
-        self.text_splitters = {
-            "recursive": RecursiveCharacterTextSplitter(
-                chunk_size=500,
-                chunk_overlap=50,
-                separators=["\n\n", "\n", "。", ".", " ", ""],
-            ),
-            "token": TokenTextSplitter(chunk_size=400, chunk_overlap=40),
-            "character": CharacterTextSplitter(
-                chunk_size=600, chunk_overlap=60, separator="\n"
-            ),
-        }
+        """並列チャンキング用のプロセスプールを初期化（ワーカーは遅延起動）"""
+        # forkserverを明示する（Linux既定のforkは、ロガーやHTTPクライアントの
+        # スレッド起動後にforkする形になり、CPython 3.12+で非推奨のハザード。
+        # スプリッターはモジュールレベルなのでワーカー側の再importで再構築される）
+        self._max_workers = os.cpu_count() or 1
+        self._pool = ProcessPoolExecutor(
+            max_workers=self._max_workers,
+            mp_context=multiprocessing.get_context("forkserver"),
+        )
+
+    def shutdown(self):
+        """チャンキング用のプロセスプールを停止する"""
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self) -> "TextProcessor":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.shutdown()
 
     def chunk_text(self, text: str, strategy: str = "recursive") -> list[str]:
         """
@@ -38,6 +78,38 @@ class TextProcessor:
         chunks = splitter.split_text(text)
         return chunks
 
+    async def chunk_many(
+        self, texts: list[str], strategy: str = "recursive"
+    ) -> list[list[str]]:
+        """
+        複数テキストをワーカープロセスで並列にチャンキング
+
+        CPUバウンドなチャンキングをイベントループの外へ逃がし、
+        embedding APIのI/Oと重ねて実行できるようにする。
+
+        Args:
+            texts: チャンキングするテキストのリスト
+            strategy: チャンキング戦略 ("recursive", "token", "character")
+
+        Returns:
+            テキストごとのチャンクリスト（入力と同じ順序）
+        """
+        if not texts:
+            return []
+
+        loop = asyncio.get_running_loop()
+
+        # ワーカー数に合わせてテキストを分割してマップ
+        step = max(1, -(-len(texts) // self._max_workers))
+        parts = [texts[i : i + step] for i in range(0, len(texts), step)]
+        results = await asyncio.gather(
+            *(
+                loop.run_in_executor(self._pool, _chunk_batch, part, strategy)
+                for part in parts
+            )
+        )
+        return [chunks for part_result in results for chunks in part_result]
+
     def get_available_strategies(self) -> list[str]:
         """利用可能なチャンキング戦略を取得"""
         return list(self.text_splitters.keys())
@@ -0,0 +1,46 @@
+"""
+SQLAlchemy engineのプロセス内シングルトン管理。
+"""
+
+from functools import lru_cache
+
+from pgvector.psycopg import register_vector
+from sqlalchemy import Engine, create_engine, event
+
+from config.settings import settings
+
+
+@lru_cache(maxsize=None)
+def get_engine(url: str) -> Engine:
+    """
+    接続URLごとにengineを1つだけ生成して再利用する
+
+    プロセス内でDataProcessorを複数回生成しても、コネクションプールと
+    プリペアドステートメントキャッシュが共有される。初回アクセス時に
+    遅延生成されるため、fork後のワーカーでも安全に使用できる。
+
+    Args:
+        url: データベース接続文字列
+
+    Returns:
+        キャッシュされたEngineインスタンス
+    """
+    engine = create_engine(
+        url,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_use_lifo=settings.DB_POOL_USE_LIFO,
+        insertmanyvalues_page_size=1000,
+        future=True,
+    )
+
+    # pgvectorのバイナリアダプターを接続ごとに登録
+    # （COPY ... FORMAT BINARYでvector型を直接書き込めるようにする）
+    @event.listens_for(engine, "connect")
+    def _register_vector(dbapi_connection, connection_record):
+        register_vector(dbapi_connection)
+
+    return engine
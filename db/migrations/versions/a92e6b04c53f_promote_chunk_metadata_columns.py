@@ -0,0 +1,56 @@
+"""promote chunk metadata columns
+
+Revision ID: a92e6b04c53f
+Revises: c7d59e3a1b64
+Create Date: 2026-08-28 11:42:09.887135
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a92e6b04c53f"
+down_revision: Union[str, None] = "c7d59e3a1b64"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("chunks", sa.Column("chunk_type", sa.Text(), nullable=True))
+    op.add_column("chunks", sa.Column("chunk_index", sa.Integer(), nullable=True))
+    op.add_column("chunks", sa.Column("chunk_method", sa.Text(), nullable=True))
+    op.add_column("chunks", sa.Column("is_question", sa.Boolean(), nullable=True))
+
+    # 既存行はJSONBのmetadataからバックフィルする
+    op.execute(
+        """
+        UPDATE chunks SET
+            chunk_type = COALESCE(metadata->>'type', 'answer'),
+            chunk_index = COALESCE(
+                (metadata->'chunk_info'->>'chunk_index')::int, 0
+            ),
+            chunk_method = COALESCE(
+                metadata->'chunk_info'->>'chunk_method', 'single'
+            ),
+            is_question = COALESCE(
+                (metadata->'chunk_info'->>'is_question')::boolean, false
+            )
+        """
+    )
+
+    op.alter_column("chunks", "chunk_type", nullable=False)
+    op.alter_column("chunks", "chunk_index", nullable=False)
+    op.alter_column("chunks", "chunk_method", nullable=False)
+    op.alter_column("chunks", "is_question", nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("chunks", "is_question")
+    op.drop_column("chunks", "chunk_method")
+    op.drop_column("chunks", "chunk_index")
+    op.drop_column("chunks", "chunk_type")
@@ -0,0 +1,29 @@
+"""add sources url hash index
+
+Revision ID: c7d59e3a1b64
+Revises: f41c2a9b7d08
+Create Date: 2026-08-28 11:03:48.571206
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c7d59e3a1b64"
+down_revision: Union[str, None] = "f41c2a9b7d08"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_sources_url_hash", "sources", ["url"], postgresql_using="hash"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_sources_url_hash", table_name="sources")
@@ -0,0 +1,33 @@
+"""change embeding to halfvec
+
+Revision ID: f41c2a9b7d08
+Revises: 828573f63fb4
+Create Date: 2026-08-28 10:15:22.103944
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f41c2a9b7d08"
+down_revision: Union[str, None] = "828573f63fb4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        "ALTER TABLE chunks ALTER COLUMN embeding TYPE halfvec(1536) "
+        "USING embeding::halfvec(1536)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(
+        "ALTER TABLE chunks ALTER COLUMN embeding TYPE vector(1536) "
+        "USING embeding::vector(1536)"
+    )
@@ -1,8 +1,8 @@
 from datetime import datetime
 from typing import Any
 
-from pgvector.sqlalchemy import Vector
-from sqlalchemy import DateTime, ForeignKey, Integer, Text, func
+from pgvector.sqlalchemy import HALFVEC
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, Text, func
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import text
@@ -33,6 +33,10 @@ class CopyrightHolders(Base):
 
 class Sources(Base):
     __tablename__ = "sources"
+    __table_args__ = (
+        # 長いURLの完全一致検索用（upsertのホットパスで使用）
+        Index("ix_sources_url_hash", "url", postgresql_using="hash"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     copyright_holder_id: Mapped[int] = mapped_column(
@@ -72,7 +76,15 @@ class Chunks(Base):
         nullable=False,
     )
     content: Mapped[str] = mapped_column(Text, nullable=False)
-    embeding: Mapped[list[float]] = mapped_column(Vector(1536), nullable=False)
+    # FP16で保存（text-embedding-3-smallの1536次元では検索精度の劣化は
+    # 無視できる範囲で、ストレージとインデックスのメモリを半減できる）
+    embeding: Mapped[list[float]] = mapped_column(HALFVEC(1536), nullable=False)
+    # ホットなフィールドは型付きカラムに昇格
+    # （JSONBのエンコード/デコードを避け、WHERE句での絞り込みを可能にする）
+    chunk_type: Mapped[str] = mapped_column(Text, nullable=False)
+    chunk_index: Mapped[int] = mapped_column(Integer, nullable=False)
+    chunk_method: Mapped[str] = mapped_column(Text, nullable=False)
+    is_question: Mapped[bool] = mapped_column(Boolean, nullable=False)
     metadata_: Mapped[dict[str, Any]] = mapped_column(
         name="metadata",
         type_=JSONB,
@@ -23,11 +23,12 @@ async def main():
 
     logger.info("🚀 データ処理プログラムを開始します")
 
+    processor = None
     try:
-        # データ読み込み
+        # データ読み込み（ストリーミングスキャン、全行は一度に展開しない）
         logger.info("Hugging Faceからデータを読み込み中...")
-        df = pl.read_ndjson("hf://datasets/matsuxr/JaGovFaqs-22k/data.jsonl")
-        logger.info(f"データ読み込み完了: {len(df):,} 行")
+        df = pl.scan_ndjson("hf://datasets/matsuxr/JaGovFaqs-22k/data.jsonl")
+        logger.info("データスキャンを開始しました")
 
         # データプロセッサーの初期化（ロガーを渡す）
         processor = DataProcessor(CONNECTION, logger)
@@ -40,14 +41,16 @@ async def main():
             return
 
         # 全データセットを処理（limitを削除）
+        # バルクロード中はANNインデックスを外して挿入を高速化
         logger.info("全データセットの処理を開始します...")
-        await processor.insert_dataframe(
-            df,
-            chunk_strategy="token",
-            limit=None,  # 無制限
-            progress_interval=500,  # 500行ごとに進捗表示
-            commit_interval=100,  # 100行ごとにコミット
-        )
+        with processor.bulk_ingest():
+            await processor.insert_dataframe(
+                df,
+                chunk_strategy="token",
+                limit=None,  # 無制限
+                progress_interval=500,  # 500行ごとに進捗表示
+                commit_interval=100,  # 100行ごとにコミット
+            )
 
         # 統計情報の表示
         logger.info("データベース統計情報を取得中...")
@@ -67,7 +70,12 @@ async def main():
         logger.log_error(e, "メイン処理")
         raise
     finally:
+        # チャンキング用のワーカープロセスを停止する
+        if processor is not None:
+            processor.text_processor.shutdown()
         logger.info("プログラムを終了します")
+        # キューに残ったログを書き切ってから終了する
+        logger.close()
 
 
 if __name__ == "__main__":